@@ -9,13 +9,13 @@ import os
 import os.path
 from abc import ABCMeta
 from abc import abstractmethod
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException
 from PIL import Image
 import PortalProperties
+import PortalDriver
 
 __version__ = "1.0.1"
 __author__ = "Jose Miguel Colella"
@@ -35,23 +35,27 @@ class AbstractPortal(object):
 
 
     Attributes:
-        driver (selenium.webdriver.phantomjs.webdriver.WebDriver): The webdriver instance
+        driverBackend (PortalDriver.AbstractDriverBackend): The backend that creates the webdriver
+        driver (selenium.webdriver.remote.webdriver.WebDriver): The webdriver instance
+        maxWindowHandles (int): The number of open windows after which the session is recycled
+        maxMemoryMB (int): The browser RSS in megabytes after which the session is recycled
+        sessionRecycles (int): The number of times the session has been recycled
     """
     __metaclass__ = ABCMeta
     screenshotDebugDir = "screenshotDebug"
 
-    def __init__(self, username, password):
+    def __init__(self, username, password, driverBackend=None, maxWindowHandles=5, maxMemoryMB=1024):
         assert type(username) is str, print("username is a string")
         assert type(password) is str, print("password is a string")
-        # If the operating system is windows or *nix.
-        self._osNull = {
-            "nt": "NUL",
-            "posix": "/dev/null"
-        }
-        self.driver = webdriver.PhantomJS(
-            service_log_path=self._osNull[os.name], service_args=["--ignore-ssl-errors=true"])
-        self.driver.maximize_window()
+        self.driverBackend = driverBackend or PortalDriver.ChromeHeadlessBackend()
+        assert isinstance(self.driverBackend, PortalDriver.AbstractDriverBackend), print(
+            "driverBackend is a PortalDriver.AbstractDriverBackend")
+        self.driver = self._startDriver()
         self.windowSize = self.driver.get_window_size()
+        self.maxWindowHandles = maxWindowHandles
+        self.maxMemoryMB = maxMemoryMB
+        self.sessionRecycles = 0
+        self._loggedIn = False
         self._username = username
         self._password = password
         self._screenshotDebugDumpDirPath = "{path}/{directory}".format(
@@ -104,6 +108,9 @@ class AbstractPortal(object):
         """
         return self._password
 
+    def _startDriver(self):
+        return self.driverBackend.start()
+
     def _checkDumpDirIsCreated(self):
         if not os.path.isdir(self.screenshotDebugDir):
             os.mkdir(self._screenshotDebugDumpDirPath)
@@ -133,9 +140,63 @@ class AbstractPortal(object):
         logging.debug("Sending button click")
         submitButton.click()
         logging.debug("Waiting for page to load")
+        self._loggedIn = True
+
+    def sessionResources(self):
+        """sessionResources() returns the resources currently held by the browser session
+
+        Returns:
+            dict: The number of open window handles and the browser RSS in megabytes. The RSS
+            is None when it can not be measured
+        """
+        rss = self.driverBackend.processMemory(self.driver)
+        return {
+            "windowHandles": len(self.driver.window_handles),
+            "rssMB": None if rss is None else rss / (1024 * 1024)
+        }
+
+    def _closeExtraWindows(self):
+        """Closes every window but the first one and switches back to it
+        """
+        windowHandles = self.driver.window_handles
+        for windowHandle in windowHandles[1:]:
+            self.driver.switch_to_window(windowHandle)
+            self.driver.close()
+        self.driver.switch_to_window(windowHandles[0])
+
+    def _restoreSessionState(self):
+        """Hook for the portals to restore the state that is lost when the session
+        is recycled after logging in again
+        """
+        pass
+
+    def recycleSession(self):
+        """recycleSession() quits the browser and starts a new one with the same driver backend.
+        If the portal was logged in, the login and the portal state are restored
+        """
+        logging.info("Recycling browser session")
+        self.driver.quit()
+        self.driver = self._startDriver()
+        self.sessionRecycles += 1
+        if self._loggedIn:
+            self.login()
+            self._restoreSessionState()
+
+    def _recycleSessionIfNeeded(self):
+        resources = self.sessionResources()
+        logging.debug("Session resources: {}".format(resources))
+        if resources["windowHandles"] > self.maxWindowHandles:
+            logging.warning("{} open windows exceed the limit of {}".format(
+                resources["windowHandles"], self.maxWindowHandles))
+        elif resources["rssMB"] is not None and resources["rssMB"] > self.maxMemoryMB:
+            logging.warning("Browser RSS of {:.0f}MB exceeds the limit of {}MB".format(
+                resources["rssMB"], self.maxMemoryMB))
+        else:
+            return
+        self.recycleSession()
 
     def close(self):
-        """Closes the driver session and the phantomjs process.
+        """Closes the driver session and the browser process.
         """
         self.driver.quit()
 
@@ -147,9 +208,10 @@ class GPNPortal(AbstractPortal):
     accountsListIdentifier = "identity-btn-name"
     accountsListDropdownIdentifier = "divIdentityList"
 
-    def __init__(self, username, password):
-        super(GPNPortal, self).__init__(username, password)
+    def __init__(self, username, password, driverBackend=None, maxWindowHandles=5, maxMemoryMB=1024):
+        super(GPNPortal, self).__init__(username, password, driverBackend, maxWindowHandles, maxMemoryMB)
         self.accountsList = set()
+        self.currentAccount = None
         self.accountNameRegex = re.compile(r":(?P<accountName>.+):")
 
     @property
@@ -173,14 +235,40 @@ class GPNPortal(AbstractPortal):
             "identity-btn-name").text
         return currentAccountName
 
-    def login(self):
-        super(GPNPortal, self).login()
+    def _cleanAccountName(self, account):
+        return (re.search(self.accountNameRegex, account).group("accountName")).strip()
+
+    def _getAccountListRows(self):
+        # Button needs to be clicked in order to see other accounts
+        self.driver.find_element_by_id(
+            GPNPortal.accountsListIdentifier).click()
+        accountList = self.driver.find_element_by_id(
+            GPNPortal.accountsListDropdownIdentifier)
+        # Everything but the first and last element as the first element is the tr -> Switch accounts and the last tr
+        # has an empty name
+        return accountList.find_elements_by_tag_name("tr")[1:-1]
+
+    def _waitForAccountPage(self):
         try:
             WebDriverWait(self.driver, 30).until(
                 EC.visibility_of_element_located((By.CLASS_NAME, "black-1")))
         except Exception:
             logging.warning("The page could not load")
         time.sleep(5)
+
+    def _restoreSessionState(self):
+        # A new login always lands on the default account
+        if self.currentAccount is None or self._cleanAccountName(self._getCurrentAccountName()) == self.currentAccount:
+            return
+        accountRow = next(accountListRow for accountListRow in self._getAccountListRows()
+                          if self._cleanAccountName(accountListRow.text) == self.currentAccount)
+        accountRow.click()
+        self._waitForAccountPage()
+        logging.info("Restored account: {}".format(self.currentAccount))
+
+    def login(self):
+        super(GPNPortal, self).login()
+        self._waitForAccountPage()
         self.portalWindow = self.driver.current_window_handle
         self._saveDebugScreenshot("Login")
 
@@ -205,6 +293,9 @@ class GPNPortal(AbstractPortal):
         """
         assert startMonth == endMonth, "Expected startMonth to be equal to endMonth. {} is not equal to {}".format(
             startMonth, endMonth)
+        self._recycleSessionIfNeeded()
+        # The report of a previous call would otherwise stay open
+        self._closeExtraWindows()
         currentYear = datetime.date.today().year
         xfConsumptionPage = "https://www.gomeznetworks.com/reports/flexReport.aspx?x=&startdate={startYear}/{startMonth}/{startDay}&enddate={endYear}/{endMonth}/{endDay}".format(
             startYear=currentYear,
@@ -235,33 +326,17 @@ class GPNPortal(AbstractPortal):
         return xfConsumption
 
     def switchAccount(self):
-        if len(self.driver.window_handles) > 1:
-            self.driver.execute_script("window.close()")
-            self.driver.switch_to_window(self.driver.window_handles[0])
-        cleanAccountName = lambda account: (
-            re.search(self.accountNameRegex, account).group("accountName")).strip()
-        self.accountsList.add(cleanAccountName(self._getCurrentAccountName()))
-        # Button needs to be clicked in order to see other accounts
-        self.driver.find_element_by_id(
-            GPNPortal.accountsListIdentifier).click()
-        accountList = self.driver.find_element_by_id(
-            GPNPortal.accountsListDropdownIdentifier)
-        # Everything but the first and last element as the first element is the tr -> Switch accounts and the last tr
-        # has an empty name
-        accountListRows = accountList.find_elements_by_tag_name("tr")[1:-1]
-        accounts = [{"name": cleanAccountName(accountListRow.text), "node": accountListRow}
-                    for accountListRow in accountListRows if cleanAccountName(accountListRow.text) not in self.accountsList]
+        self._closeExtraWindows()
+        self.accountsList.add(self._cleanAccountName(self._getCurrentAccountName()))
+        accountListRows = self._getAccountListRows()
+        accounts = [{"name": self._cleanAccountName(accountListRow.text), "node": accountListRow}
+                    for accountListRow in accountListRows if self._cleanAccountName(accountListRow.text) not in self.accountsList]
         logging.info(accounts)
         # Click the first account in the dropdown
         accounts[0]["node"].click()
-        try:
-            WebDriverWait(self.driver, 30).until(
-                EC.visibility_of_element_located((By.CLASS_NAME, "black-1")))
-        except Exception:
-            logging.warning("The page could not load")
-        time.sleep(5)
-        logging.info("Current Account: {}".format(
-            cleanAccountName(self._getCurrentAccountName())))
+        self._waitForAccountPage()
+        self.currentAccount = self._cleanAccountName(self._getCurrentAccountName())
+        logging.info("Current Account: {}".format(self.currentAccount))
         self._saveDebugScreenshot("SwitchAccount.png")
         logging.info(self.accountsList)
 
@@ -291,11 +366,8 @@ class DynatracePortal(AbstractPortal):
     def submitButtonIdentifier(self):
         return "signIn"
 
-    def __init__(self, username, password):
-        super(DynatracePortal, self).__init__(username, password)
-        # Sets the driver to wait 10 seconds to poll the DOM. Very useful for
-        # sites like Dynatrace Portal that take a while to load elements
-        self.driver.implicitly_wait(10)
+    def __init__(self, username, password, driverBackend=None, maxWindowHandles=5, maxMemoryMB=1024):
+        super(DynatracePortal, self).__init__(username, password, driverBackend, maxWindowHandles, maxMemoryMB)
         self.chartsCaptured = set()
         self.currentAccountName = self.username
         self.croppingChartsDimension = {
@@ -311,6 +383,13 @@ class DynatracePortal(AbstractPortal):
             "down": 400
         }
 
+    def _startDriver(self):
+        driver = super(DynatracePortal, self)._startDriver()
+        # Sets the driver to wait 10 seconds to poll the DOM. Very useful for
+        # sites like Dynatrace Portal that take a while to load elements
+        driver.implicitly_wait(10)
+        return driver
+
     def _cropElement(self, selectorType, selector, sourceFile, destinationFile="output.png"):
         """Allows for cropping elements from an image given a selectorType, and
         selector as well as a destination file to save the element to.
@@ -376,6 +455,7 @@ class DynatracePortal(AbstractPortal):
         self._saveDebugScreenshot("ChartsAvailable")
 
     def getChartPage(self, chartName):
+        self._recycleSessionIfNeeded()
         self.getInteractiveCharts()
         chartTimeoutSeconds = 60
         availableCharts = self.driver.find_elements_by_class_name(
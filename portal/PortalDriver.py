@@ -0,0 +1,224 @@
+from __future__ import print_function
+import os
+from abc import ABCMeta
+from abc import abstractmethod
+from selenium import webdriver
+try:
+    import psutil
+except ImportError:
+    # Memory accounting of the browser process is disabled without psutil
+    psutil = None
+
+__version__ = "1.0.0"
+__author__ = "Jose Miguel Colella"
+__email__ = "jose.colella@dynatrace.com"
+__license__ = "MIT"
+
+
+class AbstractDriverBackend(object):
+
+    """AbstractDriverBackend encapsulates the creation of the webdriver used by
+    the portals. Every backend starts the browser with a fixed viewport, so that
+    the cropping dimensions of the portals stay stable between runs, and blocks
+    the resources that are not needed for the captures
+
+    Attributes:
+        windowSize (dict): The width and height of the browser viewport
+        blockedUrlPatterns (tuple): The url wildcard patterns that are not loaded
+    """
+    __metaclass__ = ABCMeta
+    defaultWindowSize = {
+        "width": 1920,
+        "height": 1080
+    }
+    # Fonts, analytics and ads are never part of a chart capture
+    defaultBlockedUrlPatterns = (
+        "*.woff",
+        "*.woff2",
+        "*.ttf",
+        "*.otf",
+        "*.eot",
+        "*google-analytics.com*",
+        "*googletagmanager.com*",
+        "*googletagservices.com*",
+        "*doubleclick.net*",
+        "*googlesyndication.com*",
+        "*adservice.google.com*",
+        "*facebook.net*",
+        "*hotjar.com*",
+    )
+
+    def __init__(self, windowSize=None, blockedUrlPatterns=None):
+        # If the operating system is windows or *nix.
+        self._osNull = {
+            "nt": "NUL",
+            "posix": "/dev/null"
+        }
+        self.windowSize = dict(windowSize or AbstractDriverBackend.defaultWindowSize)
+        if blockedUrlPatterns is None:
+            blockedUrlPatterns = AbstractDriverBackend.defaultBlockedUrlPatterns
+        self.blockedUrlPatterns = tuple(blockedUrlPatterns)
+
+    @property
+    @abstractmethod
+    def name(self):
+        """
+        str: The name of the browser engine
+        """
+        pass
+
+    @abstractmethod
+    def _createDriver(self):
+        """
+        Returns:
+            selenium.webdriver.remote.webdriver.WebDriver: A new webdriver instance
+        """
+        pass
+
+    @abstractmethod
+    def _blockResources(self, driver):
+        """Configures `driver` so that urls matching `blockedUrlPatterns` are not loaded
+        """
+        pass
+
+    def start(self):
+        """start() creates the webdriver, sets the fixed viewport and enables the resource blocking
+
+        Returns:
+            selenium.webdriver.remote.webdriver.WebDriver: The configured webdriver instance
+        """
+        driver = self._createDriver()
+        driver.set_window_size(self.windowSize["width"], self.windowSize["height"])
+        if self.blockedUrlPatterns:
+            self._blockResources(driver)
+        return driver
+
+    def processMemory(self, driver):
+        """processMemory(driver) returns the resident memory of the browser processes of `driver`,
+        which are the driver service process and all of its children
+
+        Returns:
+            int: The RSS in bytes, or None if psutil is not installed or the process has exited
+        """
+        if psutil is None:
+            return None
+        try:
+            serviceProcess = psutil.Process(driver.service.process.pid)
+            processes = [serviceProcess] + serviceProcess.children(recursive=True)
+        except (AttributeError, psutil.Error):
+            return None
+        rss = 0
+        for process in processes:
+            # Renderer processes come and go while the page loads
+            try:
+                rss += process.memory_info().rss
+            except psutil.Error:
+                pass
+        return rss
+
+
+class ChromeHeadlessBackend(AbstractDriverBackend):
+
+    """ChromeHeadlessBackend runs the portals on headless Chrome, blocking
+    resources through the Chrome DevTools protocol
+    """
+
+    def __init__(self, windowSize=None, blockedUrlPatterns=None, executablePath="chromedriver"):
+        super(ChromeHeadlessBackend, self).__init__(windowSize, blockedUrlPatterns)
+        self.executablePath = executablePath
+
+    @property
+    def name(self):
+        return "Headless Chrome"
+
+    def _createDriver(self):
+        options = webdriver.ChromeOptions()
+        options.add_argument("--headless")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--ignore-certificate-errors")
+        options.add_argument("--hide-scrollbars")
+        options.add_argument("--window-size={width},{height}".format(**self.windowSize))
+        return webdriver.Chrome(
+            executable_path=self.executablePath, chrome_options=options, service_log_path=self._osNull[os.name])
+
+    def _executeCdpCommand(self, driver, cmd, params):
+        # Older selenium releases do not expose execute_cdp_cmd, so the
+        # chromedriver endpoint is registered by hand
+        if hasattr(driver, "execute_cdp_cmd"):
+            return driver.execute_cdp_cmd(cmd, params)
+        driver.command_executor._commands["executeCdpCommand"] = (
+            "POST", "/session/$sessionId/goog/cdp/execute")
+        return driver.execute("executeCdpCommand", {"cmd": cmd, "params": params})["value"]
+
+    def _blockResources(self, driver):
+        self._executeCdpCommand(driver, "Network.enable", {})
+        self._executeCdpCommand(driver, "Network.setBlockedURLs", {"urls": list(self.blockedUrlPatterns)})
+
+
+class PhantomJSBackend(AbstractDriverBackend):
+
+    """PhantomJSBackend runs the portals on PhantomJS, aborting the blocked
+    resources from the PhantomJS page context
+    """
+    # The callback runs inside PhantomJS, so the wildcard patterns are turned
+    # into regular expressions there
+    _blockResourcesScript = """
+    var patterns = arguments[0].map(function (pattern) {
+        var escaped = pattern.replace(/[.+?^${}()|[\\]\\\\]/g, "\\\\$&").replace(/\\*/g, ".*");
+        return new RegExp("^" + escaped + "$", "i");
+    });
+    this.onResourceRequested = function (requestData, networkRequest) {
+        for (var i = 0; i < patterns.length; i++) {
+            if (patterns[i].test(requestData.url)) {
+                networkRequest.abort();
+                return;
+            }
+        }
+    };
+    """
+
+    def __init__(self, windowSize=None, blockedUrlPatterns=None, executablePath="phantomjs"):
+        super(PhantomJSBackend, self).__init__(windowSize, blockedUrlPatterns)
+        self.executablePath = executablePath
+
+    @property
+    def name(self):
+        return "Phantom JS"
+
+    def _createDriver(self):
+        return webdriver.PhantomJS(
+            executable_path=self.executablePath, service_log_path=self._osNull[os.name],
+            service_args=["--ignore-ssl-errors=true"])
+
+    def _blockResources(self, driver):
+        driver.command_executor._commands["executePhantomScript"] = (
+            "POST", "/session/$sessionId/phantom/execute")
+        driver.execute("executePhantomScript", {
+            "script": PhantomJSBackend._blockResourcesScript,
+            "args": [list(self.blockedUrlPatterns)]
+        })
+
+
+backends = {
+    "chrome": ChromeHeadlessBackend,
+    "phantomjs": PhantomJSBackend
+}
+
+
+def getBackend(name, **kwargs):
+    """getBackend(name, **kwargs) returns an instance of the driver backend registered as `name`
+
+    Args:
+        name (str): The name of the backend, e.g "chrome", "phantomjs"
+
+    Returns:
+        AbstractDriverBackend: The driver backend initialized with `kwargs`
+
+    Raises:
+        AssertionError: If `name` is not a registered backend
+    """
+    assert name in backends, "Expected one of the backends: {}. Got {}".format(
+        sorted(backends), name)
+    return backends[name](**kwargs)
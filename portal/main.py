@@ -1,6 +1,7 @@
 import argparse
 import logging
 import Portal
+import PortalDriver
 import tqdm
 
 logging.basicConfig(level=logging.INFO)
@@ -20,10 +21,19 @@ if __name__ == '__main__':
         "-v", "--verbose", help="Display debug message", action="store_true")
     parser.add_argument(
         "-c", "--chart-names", nargs="+", help="The name of the chart to capture")
+    parser.add_argument(
+        "-b", "--backend", help="The browser engine used for the captures", type=str,
+        choices=sorted(PortalDriver.backends), default="chrome")
+    parser.add_argument(
+        "-m", "--max-memory", help="The browser memory in MB after which the session is restarted", type=int, default=1024)
+    parser.add_argument(
+        "-w", "--max-windows", help="The number of open windows after which the session is restarted", type=int, default=5)
     args = parser.parse_args()
-    print("Initializing Phantom JS web driver")
-    portal = Portal.DynatracePortal(args.username, args.password)
-    print("Initialized Phantom JS web driver")
+    driverBackend = PortalDriver.getBackend(args.backend)
+    print("Initializing {} web driver".format(driverBackend.name))
+    portal = Portal.DynatracePortal(
+        args.username, args.password, driverBackend, maxWindowHandles=args.max_windows, maxMemoryMB=args.max_memory)
+    print("Initialized {} web driver".format(driverBackend.name))
     print("Logging in to Dynatrace portal")
     portal.login()
     print("Successfully logged in to Dynatrace portal")
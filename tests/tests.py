@@ -5,6 +5,7 @@ from nose.tools import assert_equals
 from nose.tools import raises
 sys.path.append(os.path.join("portal"))
 import Portal
+import PortalDriver
 
 username = "pyang.produban.uk"
 password = "C0mpuwar3"
@@ -22,6 +23,26 @@ def test_GPN_exception_initialization():
     gpnPortal.close()
 
 
+def test_GPN_phantomjs_backend_initialization():
+    gpnPortal = Portal.GPNPortal(username, password, PortalDriver.PhantomJSBackend())
+    gpnPortal.close()
+    assert_equals(gpnPortal.windowSize, PortalDriver.AbstractDriverBackend.defaultWindowSize)
+
+
+def test_GPN_recycle_session():
+    gpnPortal = Portal.GPNPortal(username, password, maxWindowHandles=0)
+    gpnPortal._recycleSessionIfNeeded()
+    resources = gpnPortal.sessionResources()
+    gpnPortal.close()
+    assert_equals(gpnPortal.sessionRecycles, 1)
+    assert_equals(resources["windowHandles"], 1)
+
+
+@raises(Exception)
+def test_unknown_backend_exception():
+    PortalDriver.getBackend("firefox")
+
+
 # def test_GPN_test_login_url():
 #     gpnPortal = Portal.GPNPortal(username, password)
 #     gpnPortal.login()